@@ -1,6 +1,25 @@
 import gym
 import numpy as np
 
+
+def _top_k_desc(scores, k):
+    """
+    Indices of the k largest scores, best first.
+
+    Same order as argsort(scores)[-k:][::-1] with a stable sort, so equal scores go to the
+    higher index. Only the entries tied with or above the k-th largest score are sorted.
+    """
+    n = scores.shape[0]
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        kth = np.partition(scores, n - k)[n - k]
+        candidates = np.flatnonzero(~(scores < kth))  # NaN sorts above every score, keep it
+    else:
+        candidates = np.arange(n)
+    order = np.argsort(scores[candidates], kind="stable")[::-1]
+    return candidates[order[:k]]
+
 class ContinuousDispatchEnv(gym.Env):
     """
     🔁 ContinuousDispatchEnv: Wrapper to support continuous action space (suitable for SAC)
@@ -21,25 +40,29 @@ class ContinuousDispatchEnv(gym.Env):
             dtype=np.float32
         )
 
-        self.current_actions = []  # Current list of engine_ids sorted by distance
+        self.current_actions_full = []
+        self.current_actions = np.empty(0, dtype=np.int32)  # Current engine_ids sorted by distance
+        self._scores = np.zeros(max_candidates, dtype=np.float64)  # Padded action scores, reused every step
 
     def reset(self, **kwargs):
         obs_info = self.env.reset(**kwargs)
         obs = obs_info[0] if isinstance(obs_info, tuple) else obs_info
         self._update_action_map()
-        return np.asarray(obs, dtype=np.float32)
+        return obs
 
     def _update_action_map(self):
         """Retrieve dispatchable vehicles for the current event, sorted by distance"""
-        full_sorted = self.env.get_sorted_available_actions()
-        self.current_actions = full_sorted[:self.max_candidates]  # Limit to the first N closest vehicles
+        # The full list is handed to env.step, which would otherwise sort again
+        self.current_actions_full = self.env.get_sorted_available_actions()
+        # Limit to the first N closest vehicles
+        self.current_actions = np.asarray(self.current_actions_full[:self.max_candidates], dtype=np.int32)
 
     def step(self, action_cont):
         self._update_action_map()
+        current_actions = self.current_actions
 
-        if not self.current_actions:
-            obs, reward, done, info = self.env.step([])
-            obs = np.asarray(obs, dtype=np.float32)
+        if len(current_actions) == 0:
+            obs, reward, done, info = self.env.step([], presorted=self.current_actions_full)
             info["wrapped_error"] = "no_available_vehicle"
             return obs, -1000.0, True, info
 
@@ -49,25 +72,30 @@ class ContinuousDispatchEnv(gym.Env):
 
         # Validate, clip, and pad/truncate action array
         if isinstance(action_cont, (list, tuple, np.ndarray)):
-            action_cont = np.clip(np.array(action_cont), 0.0, 1.0)
+            action_cont = action_cont[:self.max_candidates]
         else:
             raise ValueError("Action must be a continuous array")
 
-        if len(action_cont) < self.max_candidates:
-            padding = np.zeros(self.max_candidates - len(action_cont))
-            action_cont = np.concatenate([action_cont, padding])
-        elif len(action_cont) > self.max_candidates:
-            action_cont = action_cont[:self.max_candidates]
+        # Written into a reused buffer, candidates beyond the action length score 0
+        scores = self._scores
+        n_scores = len(action_cont)
+        scores[:n_scores] = action_cont
+        scores[n_scores:] = 0.0
+        np.clip(scores, 0.0, 1.0, out=scores)
 
         # Select top-K indices from the closest vehicles
-        top_k = np.argsort(action_cont)[-dispatch_count:][::-1]
-        selected_idxs = [i for i in top_k if i < len(self.current_actions)]
-        selected_ids = [self.current_actions[i] for i in selected_idxs]
+        n_candidates = scores.shape[0]
+        if dispatch_count == 1 and n_candidates:
+            top_k = (n_candidates - 1 - np.argmax(scores[::-1]))[None]  # ✅ Single dispatch: last maximum, same tie rule
+        else:
+            # A dispatch count of 0 took every candidate, as argsort(...)[-0:] did
+            top_k = _top_k_desc(scores, dispatch_count if dispatch_count > 0 else n_candidates)
+        selected_idxs = top_k[top_k < len(current_actions)]
+        selected_ids = current_actions[selected_idxs].tolist()
 
-        obs, reward, done, info = self.env.step(selected_ids)
-        obs = np.asarray(obs, dtype=np.float32)
+        obs, reward, done, info = self.env.step(selected_ids, presorted=self.current_actions_full)
         info["wrapped_engine_ids"] = selected_ids
-        info["wrapped_action_idxs"] = selected_idxs
+        info["wrapped_action_idxs"] = selected_idxs.tolist()
         return obs, reward, done, info
 
     def render(self, **kwargs):
@@ -1,6 +1,27 @@
+import logging
 from datetime import datetime
+from typing import List
+
+import numpy as np
 import pandas as pd
 
+from fire_dispatch_rl_env.utils import _DEFAULT_RISK_MAP
+
+_LOG = logging.getLogger(__name__)
+
+_EPOCH = datetime(2009, 1, 1)  # Origin of FireEvent.timestamp
+
+# Casefolded labels, compared against FireEvent._risk_label_norm
+_HIGH_RISK_SET = frozenset({"high risk", "secondary fires that attract a 20 minute-response time"})
+
+# Row fields read by FireEvent / from_row / the simulator, other columns are not kept in `extra`
+_EVENT_FIELDS = (
+    "Incident_Number", "call_time", "graph_node", "incident_index",
+    "incident_profile_label", "driving_seconds", "prl_count", "brv_count",
+    "reaction_seconds", "on_scene_seconds", "station_easting", "station_northing",
+    "dispatched_vehicle_count",
+)
+
 class FireEvent:
     """
     🔥 FireEvent: Fire incident object (used in dispatch simulation)
@@ -13,28 +34,45 @@ class FireEvent:
     - driving_seconds (true response time, useful for evaluation)
     """
 
+    __slots__ = (
+        "id", "graph_node", "timestamp", "extra",
+        "risk_level", "true_driving_seconds", "required_prl", "required_brv",
+        "reaction_seconds", "on_scene_seconds", "station_position", "incident_index",
+        "_risk_label_norm", "_is_high_risk", "_required_dispatch_count", "_risk_idx",
+        "assigned", "responder_id", "response_time",
+    )
+
     def __init__(self, event_id, location, start_time, extra=None):
         self.id = event_id
         self.graph_node = location
         self.timestamp = start_time
-        self.extra = extra or {}
+        self.extra = extra = extra or {}
+        get = extra.get
 
         # 🔍 Key attributes
-        self.risk_level = self.extra.get("incident_profile_label", "Unknown")
-        self.true_driving_seconds = self.extra.get("driving_seconds", 999)
-        self.required_prl = self.extra.get("prl_count", 0)
-        self.required_brv = self.extra.get("brv_count", 0)
+        self.risk_level = get("incident_profile_label", "Unknown")
+        self.true_driving_seconds = get("driving_seconds", 999)
+        self.required_prl = get("prl_count", 0)
+        self.required_brv = get("brv_count", 0)
 
-        self.reaction_seconds = self.extra.get("reaction_seconds", 30)
-        self.on_scene_seconds = self.extra.get("on_scene_seconds", 300)
+        self.reaction_seconds = get("reaction_seconds", 30)
+        self.on_scene_seconds = get("on_scene_seconds", 300)
 
         self.station_position = (
-            self.extra.get("station_easting"),
-            self.extra.get("station_northing")
+            get("station_easting"),
+            get("station_northing")
         )
 
         # ✅ Add incident_index for response time matrix mapping
-        self.incident_index = self.extra.get("incident_index", self.id)
+        self.incident_index = get("incident_index", self.id)
+
+        # ⚡ Fixed for the event's lifetime, computed once instead of on every step
+        self._risk_label_norm = str(self.risk_level).strip().casefold() if self.risk_level is not None else ""
+        self._is_high_risk = self._risk_label_norm in _HIGH_RISK_SET
+        self._required_dispatch_count = int(
+            get("dispatched_vehicle_count", 2 if self._is_high_risk else 1)
+        )
+        self._risk_idx = _DEFAULT_RISK_MAP.get(str(self.risk_level).lower(), len(_DEFAULT_RISK_MAP) - 1)
 
         # ⛳ State tracking
         self.assigned = False
@@ -50,12 +88,10 @@ class FireEvent:
 
     def is_high_risk(self):
         """🚨 Check if this is a high-risk incident"""
-        return str(self.risk_level).strip().lower() in [
-            "high risk", "secondary fires that attract a 20 minute-response time"
-        ]
+        return self._is_high_risk
     
     def get_required_dispatch_count(self):
-        return int(self.extra.get("dispatched_vehicle_count", 2 if self.is_high_risk() else 1))
+        return self._required_dispatch_count
 
     def to_dict(self):
         """📋 Convert to dictionary (for evaluation logging)"""
@@ -78,33 +114,88 @@ class FireEvent:
             f"Time:{self.timestamp}s Response:{self.response_time}s>"
         )
 
-    @classmethod
-    def from_row(cls, row, eid):
-        """
-        🏗️ Create FireEvent object from a CSV/dict row, auto-handling time format
-        """
+    @staticmethod
+    def _parse_call_time(call_time_str):
+        """⏱️ Convert a call_time value to seconds since 2009-01-01 (0 if it cannot be parsed)"""
         try:
-            call_time_str = row.get("call_time")
             if call_time_str:
                 dt = pd.to_datetime(call_time_str)
             else:
-                dt = datetime(2009, 1, 1)  # Default origin
-            timestamp_seconds = int((dt - datetime(2009, 1, 1)).total_seconds())
+                dt = _EPOCH  # Default origin
+            return int((dt - _EPOCH).total_seconds())
         except Exception as e:
-            print(f"⚠️ FireEvent time parsing failed: {e}, defaulting to 0")
-            timestamp_seconds = 0
+            _LOG.warning("⚠️ FireEvent time parsing failed: %s, defaulting to 0", e)
+            return 0
 
-        location = row.get("graph_node", (0, 0))
+    @staticmethod
+    def _parse_location(location):
+        """📍 Convert a graph_node value (tuple or its string form) to a tuple"""
         if isinstance(location, str):
             import ast
             try:
                 location = ast.literal_eval(location)
             except Exception:
                 location = (0, 0)
+        return location
 
+    @classmethod
+    def from_row(cls, row, eid):
+        """
+        🏗️ Create FireEvent object from a CSV/dict row, auto-handling time format
+        """
         return cls(
             event_id=eid,
-            location=location,
-            start_time=timestamp_seconds,
+            location=cls._parse_location(row.get("graph_node", (0, 0))),
+            start_time=cls._parse_call_time(row.get("call_time")),
             extra=row
         )
+
+    @classmethod
+    def from_dataframe(cls, df) -> List["FireEvent"]:
+        """
+        🏗️ Create FireEvent objects for every row of an event DataFrame, in row order
+
+        call_time is parsed for the whole column at once and each distinct graph_node
+        string is evaluated only once; event ids are the row positions.
+        """
+        timestamps = cls._column_timestamps(df)
+        locations = cls._column_locations(df)
+
+        # ✅ Plain tuples are much cheaper to build than namedtuples + _asdict() per row
+        # Only the columns FireEvent actually reads are carried into each event's `extra`
+        columns = [c for c in df.columns if c in _EVENT_FIELDS]
+        return [
+            cls(event_id=eid, location=locations[eid], start_time=timestamps[eid], extra=dict(zip(columns, values)))
+            for eid, values in enumerate(df[columns].itertuples(index=False, name=None))
+        ]
+
+    @staticmethod
+    def _column_timestamps(df) -> List[int]:
+        """Parse the whole call_time column at once into seconds since 2009-01-01"""
+        if "call_time" not in df.columns:
+            return [0] * len(df)
+        call_times = df["call_time"]
+        if pd.api.types.is_numeric_dtype(call_times):
+            return [FireEvent._parse_call_time(value) for value in call_times]
+        try:
+            # Only ISO 8601 at this speed, other formats leave day/month guessing to each row as before
+            seconds = (pd.to_datetime(call_times, format="ISO8601") - pd.Timestamp(_EPOCH)).dt.total_seconds()
+        except (ValueError, TypeError, OverflowError):
+            # ⚠️ Non-ISO or mixed formats / time zones: fall back to parsing row by row
+            return [FireEvent._parse_call_time(value) for value in call_times]
+        return seconds.fillna(0).astype(np.int64).tolist()
+
+    @staticmethod
+    def _column_locations(df) -> List:
+        """Parse the graph_node column, each distinct string is evaluated only once"""
+        if "graph_node" not in df.columns:
+            return [(0, 0)] * len(df)
+        parsed = {}
+        locations = []
+        for value in df["graph_node"]:
+            if isinstance(value, str):
+                if value not in parsed:
+                    parsed[value] = FireEvent._parse_location(value)
+                value = parsed[value]
+            locations.append(value)
+        return locations
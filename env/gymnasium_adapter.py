@@ -1,8 +1,15 @@
 import gym
 from gym import Wrapper
-import numpy as np
+
+from fire_dispatch_rl_env.utils import _as_float32
 
 class GymnasiumAdapter(Wrapper):
+    """
+    将 gym 环境转换为 gymnasium 的 (obs, info) / 五元组接口。
+
+    step() 返回的 obs 不做复制，FireDispatchEnv 下是复用缓冲区的视图，下一步会被覆盖，需要保留时请自行 copy。
+    """
+
     def step(self, action):
         result = self.env.step(action)
         if len(result) == 5:
@@ -13,7 +20,7 @@ class GymnasiumAdapter(Wrapper):
         else:
             raise ValueError(f"Invalid step result format: {len(result)}")
 
-        obs = np.array(obs, dtype=np.float32)  # ✅ 保证 obs 格式
+        obs = _as_float32(obs)  # ✅ 保证 obs 格式
         return obs, reward, terminated, truncated, info
 
     def reset(self, **kwargs):
@@ -22,5 +29,5 @@ class GymnasiumAdapter(Wrapper):
             obs, info = result
         else:
             obs, info = result, {}
-        obs = np.array(obs, dtype=np.float32)  # ✅ 保证 obs 格式
+        obs = _as_float32(obs)  # ✅ 保证 obs 格式
         return obs, info
@@ -1,6 +1,7 @@
 import gym
 import numpy as np
 from .ContinuousDispatchEnv import ContinuousDispatchEnv
+from fire_dispatch_rl_env.utils import get_observation
 
 class WrappedDispatchEnv(gym.Env):
     """
@@ -21,7 +22,8 @@ class WrappedDispatchEnv(gym.Env):
         self.action_space = gym.spaces.Discrete(max_actions)
         self.observation_space = self.env.observation_space
 
-        self.current_actions = []
+        self.current_actions_full = []
+        self.current_actions = np.empty(0, dtype=np.int32)
 
     def reset(self, **kwargs):
         obs_info = self.env.reset(**kwargs)
@@ -30,46 +32,50 @@ class WrappedDispatchEnv(gym.Env):
         else:
             obs = obs_info
         self._update_action_map()
-        return np.asarray(obs, dtype=np.float32)
+        return obs
+
+    def _update_action_map(self):
+        """Retrieve dispatchable vehicles for the current event, sorted by distance"""
+        # The full list is handed to env.step, which would otherwise sort again
+        self.current_actions_full = self.env.get_sorted_available_actions()
+        # Limit to the first max_actions closest vehicles
+        self.current_actions = np.asarray(self.current_actions_full[:self.max_actions], dtype=np.int32)
 
     def step(self, action_idxs):
         self._update_action_map()
+        current_actions = self.current_actions
 
-        if not self.current_actions:
-            obs, reward, done, info = self.env.step(0)
-            obs = np.asarray(obs, dtype=np.float32)
+        if len(current_actions) == 0:
+            obs, reward, done, info = self.env.step(0, presorted=self.current_actions_full)
             info["wrapped_error"] = "no_available_vehicle"
             return obs, -1000.0, True, info
 
-        if isinstance(action_idxs, int):
-            action_idxs = [action_idxs]
-        elif isinstance(action_idxs, np.ndarray):
-            action_idxs = action_idxs.tolist()
-
         # Get the current event's risk level
-        event = self.env.sim.pending_events[0]
+        sim = self.env.sim
+        event = sim.pending_events[0]
         dispatch_count = event.get_required_dispatch_count()
 
-        # Repeat single index to match dispatch_count if needed (e.g. dispatch same vehicle multiple times)
-        if len(action_idxs) < dispatch_count:
-            action_idxs = (action_idxs * dispatch_count)[:dispatch_count]
+        if dispatch_count == 1 and isinstance(action_idxs, (np.integer, int)):
+            action_idxs = [int(action_idxs)]  # ✅ Single-dispatch fast path, no array round-trip
         else:
-            action_idxs = action_idxs[:dispatch_count]
+            action_idxs = np.atleast_1d(np.asarray(action_idxs, dtype=np.intp)).tolist()
 
-        selected_ids = []
-        for idx in action_idxs:
-            if idx < len(self.current_actions):
-                selected_ids.append(self.current_actions[idx])
+            # Repeat single index to match dispatch_count if needed (e.g. dispatch same vehicle multiple times)
+            if len(action_idxs) < dispatch_count:
+                action_idxs = (action_idxs * dispatch_count)[:dispatch_count]
             else:
-                if self.fallback_on_invalid:
-                    selected_ids.append(self.current_actions[0])
-                else:
-                    obs = get_observation(self.env.sim)
-                    obs = np.asarray(obs, dtype=np.float32)
-                    return obs, -1000.0, False, {"error": "invalid_action_index"}
-
-        obs, reward, done, info = self.env.step(selected_ids)
-        obs = np.asarray(obs, dtype=np.float32)
+                action_idxs = action_idxs[:dispatch_count]
+
+        idxs = np.asarray(action_idxs, dtype=np.intp)
+        out_of_range = idxs >= len(current_actions)
+        if out_of_range.any():
+            if not self.fallback_on_invalid:
+                obs = get_observation(sim)
+                return obs, -1000.0, False, {"error": "invalid_action_index"}
+            idxs[out_of_range] = 0  # Fall back to the closest vehicle
+        selected_ids = current_actions[idxs].tolist()
+
+        obs, reward, done, info = self.env.step(selected_ids, presorted=self.current_actions_full)
         info["wrapped_engine_ids"] = selected_ids
         info["wrapped_action_idxs"] = action_idxs
         return obs, reward, done, info
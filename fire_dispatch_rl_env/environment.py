@@ -1,9 +1,13 @@
+import logging
+
 import gym
 from gym import spaces
 import numpy as np
 
 from fire_dispatch_rl_env.simulator_core import Simulator
-from fire_dispatch_rl_env.utils import get_observation
+from fire_dispatch_rl_env.utils import get_observation, _obs_buffer_size
+
+_LOG = logging.getLogger(__name__)
 
 
 class FireDispatchEnv(gym.Env):
@@ -12,6 +16,7 @@ class FireDispatchEnv(gym.Env):
     - 支持多车调度
     - 支持动作索引越界 fallback
     - 返回格式兼容 Stable-Baselines3（obs, reward, done, info）
+    - step() 返回的 obs 是复用缓冲区的视图，需要跨步保留时请 copy
     """
 
     metadata = {"render_modes": ["human"], "render_fps": 4}
@@ -25,6 +30,7 @@ class FireDispatchEnv(gym.Env):
         self.obs_dim = config.get("obs_dim", 96)
         self.max_dispatch_per_event = config.get("max_dispatch_per_event", 4)
         self.fallback_on_invalid = config.get("fallback_on_invalid", True)
+        self.minimal_info = config.get("minimal_info", False)  # step() 只返回 step_count 和模拟器信息
 
         self.action_space = spaces.MultiDiscrete([self.num_engines] * self.max_dispatch_per_event)
         self.observation_space = spaces.Box(
@@ -35,6 +41,8 @@ class FireDispatchEnv(gym.Env):
         )
 
         self.last_sorted_actions = []
+        self._obs_buf = np.zeros(_obs_buffer_size(config), dtype=np.float32)  # ✅ 供 get_observation 复用
+        self._info_buf = {}  # ✅ 每次 step() 复用，见 _fill_info
 
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
@@ -43,7 +51,8 @@ class FireDispatchEnv(gym.Env):
         self.num_engines = len(self.sim.engines)
         self.last_sorted_actions = self.get_sorted_available_actions()
 
-        obs = get_observation(self.sim)
+        # ✅ 返回新数组：SB3 在 reset 时仍持有上一步 step() 的 obs 作为 terminal_observation
+        obs = get_observation(self.sim).copy()
         info = {
             "step_count": 0,
             "pending_events": len(self.sim.pending_events),
@@ -51,81 +60,90 @@ class FireDispatchEnv(gym.Env):
         }
         return obs, info
 
-    def step(self, action_idxs):
-        self.last_sorted_actions = self.get_sorted_available_actions()
-
-        if not self.last_sorted_actions:
-            print("⚠️ 无可调度车辆，跳过事件")
-            obs = get_observation(self.sim)
-            reward, terminated, sim_info = self.sim.step([])
+    def step(self, action_idxs, presorted=None):
+        sim = self.sim
+        # presorted：调用方已持有的当前事件完整排序列表
+        if presorted is None:
+            presorted = self.get_sorted_available_actions()
+        self.last_sorted_actions = sorted_actions = presorted
+
+        if not sorted_actions:
+            _LOG.debug("⚠️ 无可调度车辆，跳过事件")
+            obs = get_observation(sim, out=self._obs_buf)
+            reward, terminated, sim_info = sim.step([])
             # 不再因调度失败终止，只在 max_steps 停止
-            truncated = self.sim.step_count >= self.sim.max_steps
+            truncated = sim.step_count >= sim.max_steps
             done = truncated
-            info = {
-                "step_count": self.sim.step_count,
-                "pending_events": len(self.sim.pending_events),
-                "time": self.sim.time,
-                "selected_engine_ids": [],
-                "selected_engine_ranks": [],
-                "last_response_time": self.sim.response_times[-1] if self.sim.response_times else None,
-                "avg_response_time": np.mean(self.sim.response_times) if self.sim.response_times else None,
-                "terminated_flag": terminated,
-            }
-            info.update(sim_info)
+            info = self._fill_info([], [], terminated, sim_info)
             return obs, reward, done, info
 
-        # 单动作 -> 列表
-        if isinstance(action_idxs, (np.integer, int)):
-            action_idxs = [int(action_idxs)]
-        elif isinstance(action_idxs, (np.ndarray, list)):
-            action_idxs = [int(a) for a in action_idxs]
-        else:
+        # 单个动作或数组 -> 整数列表
+        if not isinstance(action_idxs, (np.integer, int, np.ndarray, list)):
             raise ValueError(f"Unsupported action type: {type(action_idxs)}")
 
-        current_event = self.sim.pending_events[0] if self.sim.pending_events else None
+        pending = sim.pending_events
+        current_event = pending[0] if pending else None
         dispatch_count = current_event.get_required_dispatch_count() if current_event else 1
-        action_idxs = action_idxs[:dispatch_count]
+        if dispatch_count == 1 and isinstance(action_idxs, (np.integer, int)):
+            action_idxs = [int(action_idxs)]  # ✅ 单车派遣快速路径，不经过数组转换
+        else:
+            action_idxs = np.atleast_1d(np.asarray(action_idxs, dtype=np.intp))[:dispatch_count].tolist()
 
         selected_engines = []
+        n_sorted = len(sorted_actions)
         for idx in action_idxs:
-            if idx < len(self.last_sorted_actions):
-                selected_engines.append(self.last_sorted_actions[idx])
+            if idx < n_sorted:
+                selected_engines.append(sorted_actions[idx])
             else:
                 if self.fallback_on_invalid:
-                    fallback_engine = self.last_sorted_actions[0]
-                    print(f"⚠️ 动作索引 {idx} 越界，使用 fallback 车辆 {fallback_engine}")
+                    fallback_engine = sorted_actions[0]
+                    _LOG.debug("⚠️ 动作索引 %s 越界，使用 fallback 车辆 %s", idx, fallback_engine)
                     selected_engines.append(fallback_engine)
                 else:
-                    print(f"❌ 动作索引 {idx} 越界，终止")
-                    obs = get_observation(self.sim)
+                    _LOG.warning("❌ 动作索引 %s 越界，终止", idx)
+                    obs = get_observation(sim, out=self._obs_buf)
                     return obs, -1000.0, True, {"error": "invalid_action_index"}
 
-        if hasattr(self.sim, "step_multi"):
-            reward, terminated, sim_info = self.sim.step_multi(selected_engines)
+        if hasattr(sim, "step_multi"):
+            reward, terminated, sim_info = sim.step_multi(selected_engines)
         else:
-            reward, terminated, sim_info = self.sim.step(selected_engines)
+            reward, terminated, sim_info = sim.step(selected_engines)
 
-        obs = get_observation(self.sim)
-        truncated = self.sim.step_count >= self.sim.max_steps
+        obs = get_observation(sim, out=self._obs_buf)
+        truncated = sim.step_count >= sim.max_steps
         done = truncated  # ✅ 不再因为 terminated 中断，只在 max_steps 时 done
 
         if sim_info.get("no_engines_dispatched", False):
-            print(f"⚠️ 步数 {self.sim.step_count}：事件未能调度车辆")
+            _LOG.debug("⚠️ 步数 %s：事件未能调度车辆", sim.step_count)
 
-        info = {
-            "step_count": self.sim.step_count,
-            "pending_events": len(self.sim.pending_events),
-            "time": self.sim.time,
-            "selected_engine_ids": selected_engines,
-            "selected_engine_ranks": action_idxs,
-            "last_response_time": self.sim.response_times[-1] if self.sim.response_times else None,
-            "avg_response_time": np.mean(self.sim.response_times) if self.sim.response_times else None,
-            "terminated_flag": terminated,
-        }
-        info.update(sim_info)
+        info = self._fill_info(selected_engines, action_idxs, terminated, sim_info)
 
         return obs, reward, done, info
 
+    def _fill_info(self, selected_engines, action_idxs, terminated, sim_info):
+        """
+        原地覆盖复用的 step info 字典。
+
+        每一步返回的都是同一个字典对象，如需在本步之后保留请自行复制。
+        """
+        sim = self.sim
+        info = self._info_buf
+        info.clear()
+        info["step_count"] = sim.step_count
+        if self.minimal_info:
+            if sim_info:
+                info.update(sim_info)
+            return info
+        info["pending_events"] = len(sim.pending_events)
+        info["time"] = sim.time
+        info["selected_engine_ids"] = selected_engines
+        info["selected_engine_ranks"] = action_idxs
+        info["last_response_time"] = sim.last_response_time
+        info["avg_response_time"] = sim.avg_response_time
+        info["terminated_flag"] = terminated
+        info.update(sim_info)
+        return info
+
     def render(self, mode="human"):
         self.sim.render()
 
@@ -141,7 +159,8 @@ class FireDispatchEnv(gym.Env):
         return self.sim.get_available_actions()
 
     def get_sorted_available_actions(self):
-        if not self.sim.pending_events:
+        sim = self.sim
+        pending = sim.pending_events
+        if not pending:
             return []
-        event_node = self.sim.pending_events[0].graph_node
-        return self.sim.get_sorted_available_engines(event_node)
+        return sim.get_sorted_available_engines(pending[0].graph_node)
@@ -1,3 +1,11 @@
+import logging
+
+_LOG = logging.getLogger(__name__)
+
+# 模拟器车辆状态数组使用的整数编码
+STATUS_CODES = {"available": 0, "driving": 1, "cooling": 2}
+
+
 class FireEngine:
     """
     🚒 FireEngine 类：单辆消防车调度状态模拟器
@@ -11,7 +19,13 @@ class FireEngine:
     - 可视化输出友好
     """
 
-    def __init__(self, engine_id, home_node, vehicle_type="PRL", cooldown_seconds=180):
+    __slots__ = (
+        "id", "home_node", "current_node", "vehicle_type",
+        "status", "remaining_time", "cooldown_duration",
+        "dispatch_count", "total_driving_time", "verbose",
+    )
+
+    def __init__(self, engine_id, home_node, vehicle_type="PRL", cooldown_seconds=180, verbose=False):
         self.id = engine_id
         self.home_node = home_node
         self.current_node = home_node
@@ -24,6 +38,8 @@ class FireEngine:
         self.dispatch_count = 0
         self.total_driving_time = 0
 
+        self.verbose = verbose  # 在 update() 中记录状态切换日志
+
     def assign_to_event(self, event_node, driving_seconds, reaction_seconds=30, on_scene_seconds=300):
         """
         🚨 分派当前车辆去响应火警事件
@@ -53,35 +69,30 @@ class FireEngine:
 
         支持推进任意秒数。若剩余时间归零或负，恢复为 available。
         """
-        time_left = seconds
-        while time_left > 0 and self.status != 'available':
-            if self.remaining_time >= time_left:
-                self.remaining_time -= time_left
-                if self.remaining_time == 0:
-                    if self.status == 'driving':
-                        self.status = 'cooling'
-                        self.remaining_time = self.cooldown_duration
-                        print(f"[Engine #{self.id}] ➡️ DRIVING → COOLING")
-                    elif self.status == 'cooling':
-                        self.status = 'available'
-                        self.remaining_time = 0
-                        self.current_node = self.home_node
-                        print(f"[Engine #{self.id}] ✅ COOLING → AVAILABLE")
-                break
-            else:
-                time_left -= self.remaining_time
-                if self.status == 'driving':
-                    self.status = 'cooling'
-                    self.remaining_time = self.cooldown_duration
-                    print(f"[Engine #{self.id}] ➡️ DRIVING → COOLING")
-                elif self.status == 'cooling':
-                    self.status = 'available'
-                    self.remaining_time = 0
-                    self.current_node = self.home_node
-                    print(f"[Engine #{self.id}] ✅ COOLING → AVAILABLE")
-
-            
-            
+        if seconds <= 0 or self.status == 'available':
+            return
+
+        if self.status == 'driving':
+            if self.remaining_time > seconds:
+                self.remaining_time -= seconds
+                return
+            seconds -= self.remaining_time
+            self.status = 'cooling'
+            self.remaining_time = self.cooldown_duration
+            if self.verbose:
+                _LOG.debug("[Engine #%s] ➡️ DRIVING → COOLING", self.id)
+            if seconds <= 0:
+                return
+
+        # cooling
+        if self.remaining_time > seconds:
+            self.remaining_time -= seconds
+        else:
+            self.status = 'available'
+            self.remaining_time = 0
+            self.current_node = self.home_node
+            if self.verbose:
+                _LOG.debug("[Engine #%s] ✅ COOLING → AVAILABLE", self.id)
 
     def is_available(self):
         """✅ 当前是否可调度"""
@@ -1,6 +1,27 @@
+import logging
 from datetime import datetime
+from typing import List
+
+import numpy as np
 import pandas as pd
 
+from fire_dispatch_rl_env.utils import _DEFAULT_RISK_MAP
+
+_LOG = logging.getLogger(__name__)
+
+_EPOCH = datetime(2009, 1, 1)  # FireEvent.timestamp 的时间原点
+
+# casefold 后的标签，与 FireEvent._risk_label_norm 比较
+_HIGH_RISK_SET = frozenset({"high risk", "secondary fires that attract a 20 minute-response time"})
+
+# FireEvent / from_row / 模拟器会读取的行字段，其他列不会保存在 `extra` 中
+_EVENT_FIELDS = (
+    "Incident_Number", "call_time", "graph_node", "incident_index",
+    "incident_profile_label", "driving_seconds", "prl_count", "brv_count",
+    "reaction_seconds", "on_scene_seconds", "station_easting", "station_northing",
+    "dispatched_vehicle_count",
+)
+
 class FireEvent:
     """
     🔥 FireEvent：火警事件对象（用于调度模拟）
@@ -13,28 +34,45 @@ class FireEvent:
     - driving_seconds（真实响应时长，可用于评估）
     """
 
+    __slots__ = (
+        "id", "graph_node", "timestamp", "extra",
+        "risk_level", "true_driving_seconds", "required_prl", "required_brv",
+        "reaction_seconds", "on_scene_seconds", "station_position", "incident_index",
+        "_risk_label_norm", "_is_high_risk", "_required_dispatch_count", "_risk_idx",
+        "assigned", "responder_id", "response_time",
+    )
+
     def __init__(self, event_id, location, start_time, extra=None):
         self.id = event_id
         self.graph_node = location
         self.timestamp = start_time
-        self.extra = extra or {}
+        self.extra = extra = extra or {}
+        get = extra.get
 
         # 🔍 关键字段
-        self.risk_level = self.extra.get("incident_profile_label", "Unknown")
-        self.true_driving_seconds = self.extra.get("driving_seconds", 999)
-        self.required_prl = self.extra.get("prl_count", 0)
-        self.required_brv = self.extra.get("brv_count", 0)
+        self.risk_level = get("incident_profile_label", "Unknown")
+        self.true_driving_seconds = get("driving_seconds", 999)
+        self.required_prl = get("prl_count", 0)
+        self.required_brv = get("brv_count", 0)
 
-        self.reaction_seconds = self.extra.get("reaction_seconds", 30)
-        self.on_scene_seconds = self.extra.get("on_scene_seconds", 300)
+        self.reaction_seconds = get("reaction_seconds", 30)
+        self.on_scene_seconds = get("on_scene_seconds", 300)
 
         self.station_position = (
-            self.extra.get("station_easting"),
-            self.extra.get("station_northing")
+            get("station_easting"),
+            get("station_northing")
         )
 
         # ✅ 添加 incident_index：用于响应时间矩阵映射
-        self.incident_index = self.extra.get("incident_index", self.id)
+        self.incident_index = get("incident_index", self.id)
+
+        # ⚡ 事件生命周期内不变，只在初始化时计算一次
+        self._risk_label_norm = str(self.risk_level).strip().casefold() if self.risk_level is not None else ""
+        self._is_high_risk = self._risk_label_norm in _HIGH_RISK_SET
+        self._required_dispatch_count = int(
+            get("dispatched_vehicle_count", 2 if self._is_high_risk else 1)
+        )
+        self._risk_idx = _DEFAULT_RISK_MAP.get(str(self.risk_level).lower(), len(_DEFAULT_RISK_MAP) - 1)
 
         # ⛳ 状态追踪
         self.assigned = False
@@ -50,12 +88,10 @@ class FireEvent:
 
     def is_high_risk(self):
         """🚨 是否高风险事件"""
-        return str(self.risk_level).strip().lower() in [
-            "high risk", "secondary fires that attract a 20 minute-response time"
-        ]
+        return self._is_high_risk
     
     def get_required_dispatch_count(self):
-        return int(self.extra.get("dispatched_vehicle_count", 2 if self.is_high_risk() else 1))
+        return self._required_dispatch_count
 
     def to_dict(self):
         """📋 转换为 dict（用于评估记录）"""
@@ -78,33 +114,87 @@ class FireEvent:
             f"时间:{self.timestamp}s 响应:{self.response_time}s>"
         )
 
-    @classmethod
-    def from_row(cls, row, eid):
-        """
-        🏗️ 从 CSV/Dict 创建事件对象，自动处理时间格式等
-        """
+    @staticmethod
+    def _parse_call_time(call_time_str):
+        """⏱️ 将 call_time 转换为自 2009-01-01 起的秒数（无法解析时为 0）"""
         try:
-            call_time_str = row.get("call_time")
             if call_time_str:
                 dt = pd.to_datetime(call_time_str)
             else:
-                dt = datetime(2009, 1, 1)  # 默认起点
-            timestamp_seconds = int((dt - datetime(2009, 1, 1)).total_seconds())
+                dt = _EPOCH  # 默认起点
+            return int((dt - _EPOCH).total_seconds())
         except Exception as e:
-            print(f"⚠️ FireEvent 时间解析失败: {e}，默认设为 0")
-            timestamp_seconds = 0
+            _LOG.warning("⚠️ FireEvent 时间解析失败: %s，默认设为 0", e)
+            return 0
 
-        location = row.get("graph_node", (0, 0))
+    @staticmethod
+    def _parse_location(location):
+        """📍 将 graph_node（元组或其字符串形式）转换为元组"""
         if isinstance(location, str):
             import ast
             try:
                 location = ast.literal_eval(location)
             except Exception:
                 location = (0, 0)
+        return location
 
+    @classmethod
+    def from_row(cls, row, eid):
+        """
+        🏗️ 从 CSV/Dict 创建事件对象，自动处理时间格式等
+        """
         return cls(
             event_id=eid,
-            location=location,
-            start_time=timestamp_seconds,
+            location=cls._parse_location(row.get("graph_node", (0, 0))),
+            start_time=cls._parse_call_time(row.get("call_time")),
             extra=row
         )
+
+    @classmethod
+    def from_dataframe(cls, df) -> List["FireEvent"]:
+        """
+        🏗️ 按行顺序为事件 DataFrame 的每一行创建 FireEvent 对象
+
+        call_time 整列一次性解析，相同的 graph_node 字符串只解析一次；事件 ID 即行号。
+        """
+        timestamps = cls._column_timestamps(df)
+        locations = cls._column_locations(df)
+
+        # ✅ 逐行使用普通 tuple，比 namedtuple + _asdict() 开销小得多
+        # 只把 FireEvent 实际读取的列放入每个事件的 `extra`
+        columns = [c for c in df.columns if c in _EVENT_FIELDS]
+        return [
+            cls(event_id=eid, location=locations[eid], start_time=timestamps[eid], extra=dict(zip(columns, values)))
+            for eid, values in enumerate(df[columns].itertuples(index=False, name=None))
+        ]
+
+    @staticmethod
+    def _column_timestamps(df) -> List[int]:
+        """一次性将整列 call_time 解析为自 2009-01-01 起的秒数"""
+        if "call_time" not in df.columns:
+            return [0] * len(df)
+        call_times = df["call_time"]
+        if pd.api.types.is_numeric_dtype(call_times):
+            return [FireEvent._parse_call_time(value) for value in call_times]
+        try:
+            # 只有 ISO 8601 走整列解析，其他格式仍逐行推断日/月，与原先一致
+            seconds = (pd.to_datetime(call_times, format="ISO8601") - pd.Timestamp(_EPOCH)).dt.total_seconds()
+        except (ValueError, TypeError, OverflowError):
+            # ⚠️ 非 ISO 或格式 / 时区不统一时：退回逐行解析
+            return [FireEvent._parse_call_time(value) for value in call_times]
+        return seconds.fillna(0).astype(np.int64).tolist()
+
+    @staticmethod
+    def _column_locations(df) -> List:
+        """解析 graph_node 列，相同的字符串只解析一次"""
+        if "graph_node" not in df.columns:
+            return [(0, 0)] * len(df)
+        parsed = {}
+        locations = []
+        for value in df["graph_node"]:
+            if isinstance(value, str):
+                if value not in parsed:
+                    parsed[value] = FireEvent._parse_location(value)
+                value = parsed[value]
+            locations.append(value)
+        return locations
@@ -1,13 +1,97 @@
+import logging
 import random
 from collections import deque
+from operator import attrgetter
 from typing import Dict, List, Tuple, Optional
 
 import numpy as np
 import pandas as pd
 
-from fire_dispatch_rl_env.fire_engine import FireEngine
+try:
+    from numba import njit
+except ImportError:  # ✅ Numba 为可选依赖，未安装时 Simulator.step 退回 NumPy 实现
+    njit = None
+
+from fire_dispatch_rl_env.fire_engine import FireEngine, STATUS_CODES
 from fire_dispatch_rl_env.fire_event import FireEvent
 
+_LOG = logging.getLogger(__name__)
+
+_STATUS_NAMES = {code: name for name, code in STATUS_CODES.items()}
+
+
+def _advance_fleet(delta, cooldown, status, remaining, available):
+    """原地将所有忙碌消防车推进 `delta` 秒，返回恢复可用的数量"""
+    freed = 0
+    for i in range(status.shape[0]):
+        if status[i] == 0:
+            continue
+        carry = delta
+        if status[i] == 1:
+            if remaining[i] > carry:
+                remaining[i] -= carry
+                continue
+            # driving → cooling，剩余秒数计入冷却时间
+            carry -= remaining[i]
+            status[i] = 2
+            remaining[i] = cooldown
+        if carry <= 0:
+            continue
+        if remaining[i] > carry:
+            remaining[i] -= carry
+        else:
+            status[i] = 0
+            remaining[i] = 0.0
+            available[i] = True
+            freed += 1
+    return freed
+
+
+def _step_numeric(delta, cooldown, status, remaining, available, dispatch_counts,
+                  selected_ids, times_row, station_cols, reaction_s, on_scene_s):
+    """
+    Simulator.step 的数值核心：先将车队推进 `delta` 秒，再派遣 `selected_ids`
+    中可用的消防车（重复出现的消防车只派遣一次）。
+
+    返回（实际派遣的消防车 ID，它们在 selected_ids 中的位置，行驶时间，平均奖励）。
+    """
+    if delta > 0:
+        _advance_fleet(delta, cooldown, status, remaining, available)
+
+    n_engines = status.shape[0]
+    n = selected_ids.shape[0]
+    used = np.empty(n, dtype=np.int64)
+    positions = np.empty(n, dtype=np.int64)
+    drive_times = np.empty(n, dtype=np.float64)
+    m = 0
+    reward = 0.0
+    for pos in range(n):
+        eid = selected_ids[pos]
+        if eid < 0:
+            eid += n_engines
+        if eid < 0 or eid >= n_engines:
+            raise IndexError("engine id out of range")
+        if not available[eid]:
+            continue
+        drive = np.float64(times_row[station_cols[eid]])
+        available[eid] = False
+        status[eid] = 1
+        remaining[eid] = reaction_s + drive + on_scene_s + drive
+        dispatch_counts[eid] += 1
+        used[m] = eid
+        positions[m] = pos
+        drive_times[m] = drive
+        reward -= drive * drive
+        m += 1
+    if m > 0:
+        reward /= m
+    return used[:m], positions[:m], drive_times[:m], reward
+
+
+if njit is not None:
+    _advance_fleet = njit(cache=True)(_advance_fleet)
+    _step_numeric = njit(cache=True)(_step_numeric)
+
 
 class Simulator:
     def __init__(self, config: Dict, event_df=None, seed: Optional[int] = None):
@@ -18,31 +102,40 @@ class Simulator:
         self.station_dists = config.get("station_dists", {})
         self.station_xy = config.get("station_xy", {})
 
-        self.engines: List[FireEngine] = []
+        self._engines: List[FireEngine] = []
+        self._engines_stale = False
         self.pending_events: deque[FireEvent] = deque()
         self.finished_events: List[FireEvent] = []
         self.response_times: List[float] = []
+        self._resp_sum: float = 0.0
+        self._resp_count: int = 0
+        self._last_response_time: Optional[float] = None
 
         self.time: int = 0
         self.step_count: int = 0
         self.dispatch_history: List[Dict] = []
 
+        # ✅ 车辆状态每次变化时递增，作为排序结果缓存的键
+        self._engine_state_version: int = 0
+        self._sorted_cache_key = None
+        self._sorted_cache_val: List[int] = []
+        self._obs_buf: Optional[np.ndarray] = None
+
         if "event_station_times" in config and isinstance(config["event_station_times"], pd.DataFrame):
-            self.event_station_times = config["event_station_times"].copy()
-            print(f"[INFO] 使用 config 中的响应时间矩阵，shape: {self.event_station_times.shape}")
+            event_station_times = config["event_station_times"]
+            print(f"[INFO] Using response time matrix from config, shape: {event_station_times.shape}")
         else:
             time_csv_path = r"D:\UCL2\FINAL CODE\drv_time_osrm_renamed.csv"
             print(f"[WARN] 从默认路径加载响应时间矩阵：{time_csv_path}")
-            self.event_station_times = pd.read_csv(time_csv_path, index_col=0)
+            event_station_times = pd.read_csv(time_csv_path, index_col=0)
 
-        self.event_station_times.index.name = "incident_index"
+        # ✅ 仅保留响应时间矩阵的 float32 稠密副本，不再持有 DataFrame
+        self._time_matrix = np.ascontiguousarray(event_station_times.to_numpy(dtype=np.float32))
+        self._station_col_idx = {name: i for i, name in enumerate(event_station_times.columns)}
+        self._build_incident_rows(event_station_times.index)
 
         # ✅ 补齐响应时间矩阵缺失的列（站点）
-        existing_cols = set(self.event_station_times.columns)
-        for eid, name in config.get("station_mapping", {}).items():
-            if name not in existing_cols:
-                print(f"[补齐] 添加缺失列: {name}")
-                self.event_station_times[name] = 3600.0
+        self._add_station_columns(config.get("station_mapping", {}).values())
 
         if seed is not None:
             self.seed(seed)
@@ -57,6 +150,9 @@ class Simulator:
         self.time = 0
         self.step_count = 0
         self.response_times = []
+        self._resp_sum = 0.0
+        self._resp_count = 0
+        self._last_response_time = None
         self.finished_events = []
         self.dispatch_history = []
 
@@ -65,7 +161,8 @@ class Simulator:
             self.pending_events = self._generate_events(event_df)
 
     def _init_engines(self):
-        self.engines = []
+        self._engines = []
+        self._engines_stale = False
         self.station_mapping = {}
 
         station_engine_counts = self.config.get("station_engine_counts", {})
@@ -84,22 +181,122 @@ class Simulator:
                     home_node=home_node,
                     cooldown_seconds=cooldown
                 )
-                self.engines.append(engine)
+                self._engines.append(engine)
                 self.station_mapping[eid] = station
                 eid += 1
 
-        self.max_engines = len(self.engines)
+        self.max_engines = len(self._engines)
         self.config["station_mapping"] = self.station_mapping
 
+        # ✅ 每辆车所属站点在矩阵中的列（缺失站点默认 3600s）
+        self._add_station_columns(self.station_mapping.values())
+        self._engine_station_col = np.array(
+            [self._station_col_idx[self.station_mapping[e.id]] for e in self._engines], dtype=np.int32
+        )
+        self._engine_dispatch_counts = np.zeros(self.max_engines, dtype=np.int32)
+        self._engine_available_mask = np.ones(self.max_engines, dtype=bool)
+        self._engine_status = np.zeros(self.max_engines, dtype=np.int8)  # 0=available, 1=driving, 2=cooling
+        self._engine_remaining = np.zeros(self.max_engines, dtype=np.float64)
+        self._engine_id_norm = (
+            np.arange(self.max_engines) / self.config.get("max_engines", 40)
+        ).astype(np.float32)
+        self._engine_state_version += 1
+
+    @property
+    def avg_response_time(self) -> Optional[float]:
+        """📈 response_times 的均值，由累加和维护，无需每步重新计算"""
+        return self._resp_sum / self._resp_count if self._resp_count else None
+
+    @property
+    def last_response_time(self) -> Optional[float]:
+        """response_times 中最近一次的响应时间"""
+        return self._last_response_time
+
+    @property
+    def engines(self) -> List[FireEngine]:
+        """FireEngine 对象列表，访问时从车辆状态数组同步"""
+        if self._engines_stale:
+            for engine, code, remaining in zip(
+                self._engines, self._engine_status.tolist(), self._engine_remaining.tolist()
+            ):
+                engine.status = _STATUS_NAMES[code]
+                engine.remaining_time = remaining
+                if code == 0:
+                    engine.current_node = engine.home_node
+            self._engines_stale = False
+        return self._engines
+
+    def _advance_engines(self, delta):
+        """⏱️ 基于车辆状态数组，将所有车辆向前推进 `delta` 秒"""
+        if self._engine_available_mask.all():
+            return
+
+        status = self._engine_status
+        remaining = self._engine_remaining
+
+        # driving → cooling，剩余秒数计入冷却时间
+        carry = np.full(self.max_engines, float(delta))
+        driving = status == 1
+        done_driving = driving & (remaining <= delta)
+        remaining[driving & ~done_driving] -= delta
+        carry[done_driving] -= remaining[done_driving]
+        status[done_driving] = 2
+        remaining[done_driving] = self.cooldown_seconds
+
+        # cooling → available
+        cooling = (status == 2) & (carry > 0)
+        done_cooling = cooling & (remaining <= carry)
+        still_cooling = cooling & ~done_cooling
+        remaining[still_cooling] -= carry[still_cooling]
+        status[done_cooling] = 0
+        remaining[done_cooling] = 0.0
+
+        if done_cooling.any():
+            self._engine_available_mask |= done_cooling
+            self._engine_state_version += 1
+        self._engines_stale = True
+
+    def _build_incident_rows(self, index):
+        """建立 incident_index -> 矩阵行号 的映射，索引为较小整数时使用 int32 稠密表"""
+        self._incident_row_idx = {}
+        self._row_of_incident = None
+        if (
+            len(index) and pd.api.types.is_integer_dtype(index)
+            and index.min() >= 0 and index.max() < 16 * len(index) + 65536
+        ):
+            self._row_of_incident = np.full(int(index.max()) + 1, -1, dtype=np.int32)
+            self._row_of_incident[index.to_numpy()] = np.arange(len(index), dtype=np.int32)
+        else:
+            self._incident_row_idx = {inc: i for i, inc in enumerate(index)}
+
+    def _incident_row(self, incident_index) -> int:
+        """事件在响应时间矩阵中的行号，缺失时返回 -1"""
+        if self._row_of_incident is None:
+            return self._incident_row_idx.get(incident_index, -1)
+        if isinstance(incident_index, (float, np.floating)) and float(incident_index).is_integer():
+            incident_index = int(incident_index)  # Incident_Number 列含 NaN 时为 float64
+        if isinstance(incident_index, (int, np.integer)) and 0 <= incident_index < len(self._row_of_incident):
+            return int(self._row_of_incident[incident_index])
+        return -1
+
+    def _add_station_columns(self, stations):
+        """为响应时间矩阵中缺失的站点追加 3600s 列"""
+        missing = [name for name in dict.fromkeys(stations) if name not in self._station_col_idx]
+        if not missing:
+            return
+        first_col = self._time_matrix.shape[1]
+        for offset, name in enumerate(missing):
+            print(f"[补齐] 添加缺失列: {name}")
+            self._station_col_idx[name] = first_col + offset
+        padding = np.full((self._time_matrix.shape[0], len(missing)), 3600.0, dtype=np.float32)
+        self._time_matrix = np.ascontiguousarray(np.hstack([self._time_matrix, padding]))
+
     def _generate_events(self, df) -> deque:
-        events = []
-        for eid, row in enumerate(df.itertuples(index=False), start=0):
-            row_data = row._asdict()
-            event = FireEvent.from_row(row_data, eid)
-            event.incident_index = row_data.get("Incident_Number", eid)
-            events.append(event)
-
-        events.sort(key=lambda e: e.timestamp)
+        events = FireEvent.from_dataframe(df)
+        for event in events:
+            event.incident_index = event.extra.get("Incident_Number", event.id)
+
+        events.sort(key=attrgetter("timestamp"))
         return deque(events)
 
     def step(self, engine_ids: List[int]) -> Tuple[float, bool, Dict]:
@@ -111,47 +308,78 @@ class Simulator:
         event = self.pending_events[0]
         event_time = event.timestamp
 
+        delta = 0
         if self.time < event_time:
             delta = event_time - self.time
             self.time = event_time
-            for engine in self.engines:
-                engine.update(seconds=delta)
-            print(f"⏩ 推进时间到事件时间 {event_time}（+{delta}s）")
+            _LOG.debug("⏩ 推进时间到事件时间 %s（+%ss）", event_time, delta)
 
         event = self.pending_events.popleft()
         dispatch_count = event.get_required_dispatch_count()
-        engine_ids = engine_ids[:dispatch_count]
+        ids = np.asarray(engine_ids[:dispatch_count], dtype=np.intp)
 
         reaction_seconds = getattr(event, "reaction_seconds", 30)
         on_scene_seconds = getattr(event, "on_scene_seconds", 300)
-
-        rewards = []
-        response_times = []
-        used_engines = []
-
-        for i, engine_id in enumerate(engine_ids):
-            engine = self.engines[engine_id]
-            if not engine.is_available():
-                continue
-
+        incident_index = getattr(event, "incident_index", event.id)
+        row = self._incident_row(incident_index)
+
+        if njit is not None:
+            # ✅ 时间推进、派遣与奖励在一次编译函数调用中完成
+            if row >= 0:
+                times_row = self._time_matrix[row]
+            else:
+                times_row = np.full(self._time_matrix.shape[1], 3600.0, dtype=np.float32)
+            used, positions, drive_times, reward = _step_numeric(
+                float(delta), float(self.cooldown_seconds),
+                self._engine_status, self._engine_remaining, self._engine_available_mask,
+                self._engine_dispatch_counts, ids, times_row, self._engine_station_col,
+                float(reaction_seconds), float(on_scene_seconds)
+            )
+        else:
+            if delta > 0:
+                self._advance_engines(delta)
+
+            # ✅ 只保留可用消防车，重复出现的消防车只派遣一次
+            usable = self._engine_available_mask[ids]
+            if ids.shape[0] > 1:
+                first = np.zeros(ids.shape[0], dtype=bool)
+                first[np.unique(ids, return_index=True)[1]] = True
+                usable &= first
+            positions = np.flatnonzero(usable)
+            used = ids[positions]
+
+            # ✅ 一次性从响应时间矩阵中取出所有选中消防车的时间
+            if row >= 0:
+                drive_times = self._time_matrix[row, self._engine_station_col[used]].astype(np.float64)
+            else:
+                drive_times = np.full(used.shape[0], 3600.0)
+
+            self._engine_available_mask[used] = False
+            self._engine_status[used] = STATUS_CODES["driving"]
+            self._engine_remaining[used] = reaction_seconds + drive_times + on_scene_seconds + drive_times
+            self._engine_dispatch_counts[used] += 1
+            reward = float(np.mean(-np.square(drive_times))) if used.shape[0] else 0.0
+
+        if delta > 0:
+            self._engines_stale = True
+        self._engine_state_version += 1
+
+        response_times = drive_times.tolist()
+        used_engines = used.tolist()
+
+        for pos, engine_id, driving_seconds in zip(positions.tolist(), used_engines, response_times):
             station = self.station_mapping.get(engine_id)
-            incident_index = getattr(event, "incident_index", event.id)
+            if row < 0:
+                _LOG.warning("响应时间获取失败: event=%s, station=%s, 原因: 未知事件",
+                             incident_index, station)
+            _LOG.debug("Engine %s dispatched from %s | Time: %.1fs", engine_id, station, driving_seconds)
 
-            try:
-                driving_seconds = self.event_station_times.at[incident_index, station]
-            except Exception as e:
-                print(f"[ERROR] 响应时间获取失败: event={incident_index}, station={station}, 原因: {e}")
-                driving_seconds = 3600.0
-
-            print(f"[DEBUG] Engine {engine_id} dispatched from {station} | Time: {driving_seconds:.1f}s")
-
-            engine.assign_to_event(
+            self._engines[engine_id].assign_to_event(
                 event_node=event.graph_node,
                 reaction_seconds=reaction_seconds,
                 on_scene_seconds=on_scene_seconds,
                 driving_seconds=driving_seconds
             )
-
             event.mark_responded(responder_id=engine_id, response_time=driving_seconds)
 
             record = {
@@ -165,15 +393,11 @@ class Simulator:
             }
 
             # ✅ 记录第一个响应的车辆信息
-            if i == 0:
+            if pos == 0:
                 record["dispatched_vehicle_count"] = dispatch_count
 
             self.dispatch_history.append(record)
 
-            rewards.append(- (driving_seconds ** 2))
-            response_times.append(driving_seconds)
-            used_engines.append(engine_id)
-
         if not used_engines:
             self.dispatch_history.append({
                 "event_id": event.id,
@@ -189,6 +413,9 @@ class Simulator:
 
         self.finished_events.append(event)
         self.response_times.extend(response_times)
+        self._resp_sum += sum(response_times)
+        self._resp_count += len(response_times)
+        self._last_response_time = response_times[-1]
         self.time = max(self.time, event.timestamp)
         done = (self.step_count >= self.max_steps) or not self.pending_events
 
@@ -199,33 +426,37 @@ class Simulator:
             "response_times": response_times,
         }
 
-        return np.mean(rewards), done, info
+        return reward, done, info
 
     def step_multi(self, engine_ids: List[int]) -> Tuple[float, bool, Dict]:
         return self.step(engine_ids)
 
     def get_available_actions(self) -> List[int]:
-        return [e.id for e in self.engines if e.is_available()]
+        return np.flatnonzero(self._engine_available_mask).tolist()
 
     def get_sorted_available_engines(self, event_node) -> List[int]:
-        candidates = [e for e in self.engines if e.is_available()]
-        if not candidates or not self.pending_events:
+        if not self.pending_events or not self._engine_available_mask.any():
             return []
 
         event = self.pending_events[0]
+        cache_key = (event.id, self._engine_state_version)
+        if cache_key == self._sorted_cache_key:
+            return self._sorted_cache_val
+
         incident_index = getattr(event, "incident_index", event.id)
 
-        times = []
-        for e in candidates:
-            station = self.station_mapping.get(e.id)
-            try:
-                t = self.event_station_times.at[incident_index, station]
-            except Exception:
-                t = float("inf")
-            times.append((e.id, t, e.dispatch_count))
-
-        sorted_ids = [eid for eid, _, _ in sorted(times, key=lambda x: (x[1], x[2], x[0]))]
-        return sorted_ids
+        row = self._incident_row(incident_index)
+        if row >= 0:
+            times = self._time_matrix[row, self._engine_station_col]
+        else:
+            times = np.full(self.max_engines, np.inf, dtype=np.float32)
+        times[~self._engine_available_mask] = np.inf
+
+        # ✅ 按（响应时间, 派遣次数）排序；lexsort 为稳定排序，并列时按车辆 id
+        order = np.lexsort((self._engine_dispatch_counts, times))
+        self._sorted_cache_key = cache_key
+        self._sorted_cache_val = order[self._engine_available_mask[order]].tolist()
+        return self._sorted_cache_val
 
     def render(self):
         print(f"[Simulator] t={self.time}s | remaining={len(self.pending_events)}")
@@ -1,5 +1,12 @@
 import numpy as np
 
+from fire_dispatch_rl_env.fire_engine import STATUS_CODES
+
+try:
+    from numba import njit
+except ImportError:  # ✅ Numba 为可选依赖，未安装时 get_observation 回退到纯 Python
+    njit = None
+
 _DEFAULT_RISK_MAP = {
     "false alarms": 0,
     "secondary fires that attract a 20 minute-response time": 1,
@@ -8,15 +15,79 @@ _DEFAULT_RISK_MAP = {
     "high risk": 4
 }
 
+# 预先计算好的 one-hot 行，按状态编码 / 默认风险索引取用
+_STATUS_ONEHOT = np.eye(len(STATUS_CODES), dtype=np.float32)
+_RISK_ONEHOT = np.eye(len(_DEFAULT_RISK_MAP), dtype=np.float32)
+
 def _one_hot(index: int, length: int):
     vec = [0] * length
     if 0 <= index < length:
         vec[index] = 1
     return vec
 
-def get_observation(sim):
+def _build_obs(out, event_x, event_y, risk_idx, risk_len, wait_time, sorted_ids, n_slots,
+               times_row, station_cols, eng_status, eng_dispatch, eng_remaining, eng_id_norm,
+               time_of_day, progress):
+    """将观测特征写入 `out`（长度至少为 5 + risk_len + 8 * n_slots）"""
+    out[:] = 0.0
+
+    # === 当前事件 ===
+    out[0] = event_x
+    out[1] = event_y
+    if 0 <= risk_idx < risk_len:
+        out[2 + risk_idx] = 1.0
+    out[2 + risk_len] = wait_time
+
+    # === 消防车状态特征 ===
+    k = 3 + risk_len
+    for idx in range(n_slots):
+        if idx < sorted_ids.shape[0]:
+            eid = sorted_ids[idx]
+        elif idx < eng_status.shape[0]:
+            eid = idx
+        else:
+            k += 8
+            continue
+
+        out[k + eng_status[eid]] = 1.0
+        out[k + 3] = min(times_row[station_cols[eid]], 3600.0) / 3600.0
+        out[k + 4] = idx / n_slots
+        out[k + 5] = min(max(eng_dispatch[eid] / 10.0, 0.0), 1.0)
+        if eng_status[eid] != 0:
+            out[k + 6] = min(max(eng_remaining[eid] / 600.0, 0.0), 1.0)
+        out[k + 7] = eng_id_norm[eid]
+        k += 8
+
+    # === 时间特征 ===
+    out[k] = time_of_day
+    out[k + 1] = progress
+
+if njit is not None:
+    _build_obs = njit(cache=True)(_build_obs)
+
+def _obs_buffer_size(cfg):
+    """get_observation 无需借助临时缓冲区裁剪即可直接写入的缓冲区长度"""
+    risk_map = cfg.get("risk_map")
+    risk_len = len(_DEFAULT_RISK_MAP) if risk_map is None else len(risk_map)
+    return max(cfg.get("obs_dim", 96), 5 + risk_len + 8 * cfg.get("obs_engine_count", 10))
+
+def _as_float32(obs):
+    """`obs` 已是 C 连续的 float32 数组时原样返回，否则进行转换"""
+    if isinstance(obs, np.ndarray) and obs.dtype == np.float32 and obs.flags.c_contiguous:
+        return obs
+    return np.ascontiguousarray(obs, dtype=np.float32)
+
+def get_observation(sim, out=None):
+    """
+    Build the observation vector for the simulator's current event.
+
+    特征写入 `out`（float32 缓冲区，长度见 `_obs_buffer_size`），未提供时写入 `sim`
+    持有的缓冲区。返回值是该复用缓冲区上长度为 obs_dim 的 float32 视图，会被下一次调用
+    覆盖，如需在当前步之后保留请自行复制。
+    """
     cfg = sim.config
-    obs = []
+    N = cfg.get("obs_engine_count", 10)
+    obs_dim = cfg.get("obs_dim", 96)
 
     # === 当前事件 ===
     event = sim.pending_events[0] if sim.pending_events else None
@@ -25,71 +96,96 @@ def get_observation(sim):
         x = ex / cfg.get("map_width", 400000)
         y = ey / cfg.get("map_height", 400000)
 
-        risk_map = cfg.get("risk_map", _DEFAULT_RISK_MAP)
-        risk_label = str(event.risk_level).lower()
-        risk_idx = risk_map.get(risk_label, len(risk_map) - 1)
-        risk_onehot = _one_hot(risk_idx, len(risk_map))
-
-        wait_time = np.clip((sim.time - event.timestamp) / 300.0, 0.0, 1.0)
-
-        obs.extend([x, y])
-        obs.extend(risk_onehot)
-        obs.append(wait_time)
-    else:
-        obs.extend([0.0, 0.0])
-        obs.extend([0] * len(_DEFAULT_RISK_MAP))
-        obs.append(0.0)
-
-    # === 消防车状态特征 ===
-    N = cfg.get("obs_engine_count", 10)
-    event_node = event.graph_node if event else None
-    sorted_ids = sim.get_sorted_available_engines(event_node) if event_node else []
-
-    for idx in range(N):
-        if idx < len(sorted_ids):
-            eng = sim.engines[sorted_ids[idx]]
-        elif idx < len(sim.engines):
-            eng = sim.engines[idx]
+        risk_map = cfg.get("risk_map")
+        if risk_map is None:
+            risk_idx, risk_len = event._risk_idx, len(_DEFAULT_RISK_MAP)
         else:
-            eng = None
-
-        if eng is None:
-            obs.extend([0, 0, 0])
-            obs.extend([0.0] * 5)
-            continue
-
-        status = _one_hot({
-            "available": 0,
-            "driving": 1,
-            "cooling": 2
-        }.get(eng.status, 0), 3)
+            risk_idx = risk_map.get(str(event.risk_level).lower(), len(risk_map) - 1)
+            risk_len = len(risk_map)
 
-        # === 响应时间特征 ===
-        try:
-            station = sim.station_mapping.get(eng.id)
-            event_idx = event.incident_index  # ✅ 使用 incident_index 替代 event.id
-            travel_time = sim.event_station_times.at[event_idx, station]
-        except Exception:
-            travel_time = 3600.0
+        wait_time = min(max((sim.time - event.timestamp) / 300.0, 0.0), 1.0)
 
-        dist = min(travel_time, 3600.0) / 3600.0
-        rank_norm = idx / N
-        usage = np.clip(eng.dispatch_count / 10.0, 0.0, 1.0)
-        remain = np.clip(eng.remaining_time / 600.0, 0.0, 1.0) if eng.status != "available" else 0.0
-
-        obs.extend(status)
-        obs.extend([dist, rank_norm, usage, remain, eng.id / cfg.get("max_engines", 40)])
+        sorted_ids = sim.get_sorted_available_engines(event.graph_node) if event.graph_node else []
+        row = sim._incident_row(event.incident_index)  # ✅ 使用 incident_index 替代 event.id
+    else:
+        x, y = 0.0, 0.0
+        risk_idx, risk_len = -1, len(_DEFAULT_RISK_MAP)
+        wait_time = 0.0
+        sorted_ids = []
+        row = -1
 
     # === 时间特征 ===
     time_of_day = (sim.time % 86400) / 86400.0
     progress_ratio = sim.step_count / sim.max_steps
-    obs.extend([time_of_day, progress_ratio])
 
     # === 补齐或裁剪维度 ===
-    obs_dim = cfg.get("obs_dim", 96)
-    if len(obs) > obs_dim:
-        obs = obs[:obs_dim]
-    elif len(obs) < obs_dim:
-        obs += [0.0] * (obs_dim - len(obs))
+    # 特征写入复用的缓冲区，不足部分为 0，返回时截取前 obs_dim 维
+    size = max(obs_dim, 5 + risk_len + 8 * N)
+    if out is not None and out.shape[0] >= size:
+        buf = out
+    else:
+        if sim._obs_buf is None or sim._obs_buf.shape[0] < size:
+            sim._obs_buf = np.zeros(size, dtype=np.float32)
+        buf = sim._obs_buf
+
+    _fill_observation(
+        buf, sim, N, x, y, risk_idx, risk_len, wait_time, sorted_ids, row, time_of_day, progress_ratio
+    )
+    if out is not None and buf is not out:
+        out[:obs_dim] = buf[:obs_dim]
+        return out[:obs_dim]
+    return buf[:obs_dim]
+
+def _fill_observation(buf, sim, N, x, y, risk_idx, risk_len, wait_time, sorted_ids, row,
+                      time_of_day, progress_ratio):
+    """将事件、消防车槽位和时间特征写入 `buf`"""
+    if njit is not None:
+        if row >= 0:
+            times_row = sim._time_matrix[row]
+        else:
+            times_row = np.full(sim._time_matrix.shape[1], 3600.0, dtype=np.float32)
+
+        _build_obs(
+            buf, x, y, risk_idx, risk_len, wait_time,
+            np.asarray(sorted_ids, dtype=np.int64), N, times_row, sim._engine_station_col,
+            sim._engine_status, sim._engine_dispatch_counts, sim._engine_remaining, sim._engine_id_norm,
+            time_of_day, progress_ratio
+        )
+        return
+
+    buf[:] = 0.0
+    buf[0] = x
+    buf[1] = y
+    if risk_len != _RISK_ONEHOT.shape[0]:
+        buf[2:2 + risk_len] = _one_hot(risk_idx, risk_len)  # 自定义 risk_map
+    elif 0 <= risk_idx < risk_len:
+        buf[2:2 + risk_len] = _RISK_ONEHOT[risk_idx]
+    buf[2 + risk_len] = wait_time
 
-    return np.array(obs, dtype=np.float32)
+    # === 消防车状态特征 ===
+    # 第 idx 个槽位依次取 sorted_ids[idx]、消防车 idx，超出消防车数量的槽位保持为 0
+    n_engines = sim._engine_status.shape[0]
+    slot_ids = np.arange(N)
+    n_sorted = min(len(sorted_ids), N)
+    slot_ids[:n_sorted] = sorted_ids[:n_sorted]
+    filled = slot_ids < n_engines
+    ids = slot_ids[filled]
+
+    status = sim._engine_status[ids]
+    if row >= 0:
+        travel_time = sim._time_matrix[row, sim._engine_station_col[ids]].astype(np.float64)
+    else:
+        travel_time = np.full(ids.shape[0], 3600.0)
+
+    k = 3 + risk_len
+    slots = buf[k:k + 8 * N].reshape(N, 8)
+    slots[filled, 0:3] = _STATUS_ONEHOT[status]
+    slots[filled, 3] = np.minimum(travel_time, 3600.0) / 3600.0  # === 响应时间特征 ===
+    slots[filled, 4] = np.flatnonzero(filled) / N
+    slots[filled, 5] = np.clip(sim._engine_dispatch_counts[ids] / 10.0, 0.0, 1.0)
+    slots[filled, 6] = np.where(status != 0, np.clip(sim._engine_remaining[ids] / 600.0, 0.0, 1.0), 0.0)
+    slots[filled, 7] = sim._engine_id_norm[ids]
+    k += 8 * N
+
+    buf[k] = time_of_day
+    buf[k + 1] = progress_ratio